@@ -0,0 +1,32 @@
+"""
+Kernels for bulk span comparisons (see `educe.annotation`).
+
+Each kernel compares one query span against N spans, given as parallel
+arrays of start and end offsets, and fills a boolean array of length N.
+The `numpy_*` kernels here use numpy broadcasting. Compiled versions
+live in `educe._annotation_kernels_jit`, which is only imported when
+needed because importing numba is slow.
+"""
+
+# License: CeCILL-B (French BSD3)
+
+# pylint: disable=invalid-name
+
+import numpy as np
+
+
+def numpy_encloses(q_start, q_end, us, ue, out):
+    """out[j] = True iff the query span encloses span j"""
+    np.logical_and(q_start <= us, ue <= q_end, out=out)
+
+
+def numpy_overlaps(q_start, q_end, us, ue, out):
+    """out[j] = True iff the query span overlaps span j
+
+    This follows `Span.overlaps` (non-inclusive): spans overlap if
+    either encloses the other or if they share at least one
+    character.
+    """
+    out[:] = (((q_start <= us) & (ue <= q_end)) |
+              ((us <= q_start) & (q_end <= ue)) |
+              (np.maximum(q_start, us) < np.minimum(q_end, ue)))
@@ -0,0 +1,44 @@
+"""
+Compiled kernels for bulk span comparisons (see
+`educe._annotation_kernels`).
+
+If numba is available, the `bulk_*` kernels are compiled versions of
+the numpy kernels that split the N spans across threads; otherwise
+they are just the numpy kernels.
+"""
+
+# License: CeCILL-B (French BSD3)
+
+# pylint: disable=invalid-name
+
+from educe._annotation_kernels import numpy_encloses, numpy_overlaps
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(cache=True, parallel=True)
+    def bulk_encloses(q_start, q_end, us, ue, out):
+        """out[j] = True iff the query span encloses span j"""
+        for j in prange(us.shape[0]):
+            out[j] = q_start <= us[j] and ue[j] <= q_end
+
+    @njit(cache=True, parallel=True)
+    def bulk_overlaps(q_start, q_end, us, ue, out):
+        """out[j] = True iff the query span overlaps span j
+
+        See `educe._annotation_kernels.numpy_overlaps`.
+        """
+        for j in prange(us.shape[0]):
+            u_start = us[j]
+            u_end = ue[j]
+            out[j] = ((q_start <= u_start and u_end <= q_end) or
+                      (u_start <= q_start and q_end <= u_end) or
+                      (max(q_start, u_start) < min(q_end, u_end)))
+else:
+    bulk_encloses = numpy_encloses
+    bulk_overlaps = numpy_overlaps
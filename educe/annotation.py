@@ -18,9 +18,22 @@ some sort of graph representation of them
 # pylint: disable=too-many-arguments, protected-access
 # pylint: disable=too-few-public-methods
 
+from functools import total_ordering
 from itertools import chain
 
+import numpy as np
+from six.moves import intern
 
+from educe._annotation_kernels import numpy_encloses, numpy_overlaps
+
+
+# number of units from which `Document.units_enclosed_by` and
+# `units_overlapping` switch to the compiled `bulk_*` kernels ; below
+# this, the numpy temporaries are cheap enough (and we avoid importing
+# numba at all)
+_KERNEL_MIN_UNITS = 10000
+
+@total_ordering
 class Span(object):
     """
     What portion of text an annotation corresponds to.
@@ -38,6 +51,8 @@ class Span(object):
     So `(0,5)` covers the whole word above, and `(1,2)`
     picks out the letter "o"
     """
+    __slots__ = ('char_start', 'char_end')
+
     def __init__(self, start, end):
         self.char_start = start
         self.char_end = end
@@ -49,29 +64,20 @@ class Span(object):
         return 'Span(%d, %d)' % (self.char_start, self.char_end)
 
     def __lt__(self, other):
-        return self.char_start < other.char_start or\
-            (self.char_start == other.char_start and
-             self.char_end < other.char_end)
+        return (self.char_start < other.char_start or
+                (self.char_start == other.char_start and
+                 self.char_end < other.char_end))
 
     def __eq__(self, other):
-        return\
-            self.char_start == other.char_start and\
-            self.char_end == other.char_end
-
-    def __gt__(self, other):
-        return other < self
+        return (self.char_start == other.char_start and
+                self.char_end == other.char_end)
 
+    # python 2 does not derive __ne__ from __eq__
     def __ne__(self, other):
         return not self == other
 
-    def __le__(self, other):
-        return self < other or self == other
-
-    def __ge__(self, other):
-        return other <= self
-
     def __hash__(self):
-        return (self.char_start, self.char_end).__hash__()
+        return hash((self.char_start, self.char_end))
 
     def length(self):
         """
@@ -115,12 +121,29 @@ class Span(object):
         See also `educe.graph.EnclosureGraph` if you might be repeating
         these checks
         """
-        if other is None:
-            return False
-        else:
-            return\
-                self.char_start <= other.char_start and\
-                self.char_end >= other.char_end
+        return (other is not None and
+                self.char_start <= other.char_start and
+                other.char_end <= self.char_end)
+
+    def encloses_many(self, starts, ends):
+        """
+        Vectorised version of `encloses` over a collection of spans,
+        given as parallel arrays of start and end offsets
+
+        Parameters
+        ----------
+        starts : array of int
+            Start offsets of the spans.
+        ends : array of int
+            End offsets of the spans.
+
+        Returns
+        -------
+        res : array of bool
+            True for each span enclosed by this one.
+        """
+        return ((self.char_start <= np.asarray(starts)) &
+                (np.asarray(ends) <= self.char_end))
 
     def overlaps(self, other, inclusive=False):
         """
@@ -139,16 +162,19 @@ class Span(object):
         """
         if other is None:
             return None
-        elif self.encloses(other):
+        s_start, s_end = self.char_start, self.char_end
+        o_start, o_end = other.char_start, other.char_end
+        if s_start <= o_start and o_end <= s_end:
+            # self encloses other
             return other
-        elif other.encloses(self):
+        elif o_start <= s_start and s_end <= o_end:
+            # other encloses self
             return self
         else:
-            common_start = max(self.char_start, other.char_start)
-            common_end = min(self.char_end, other.char_end)
-            if inclusive and common_start <= common_end:
-                return Span(common_start, common_end)
-            if common_start < common_end:
+            common_start = s_start if s_start > o_start else o_start
+            common_end = s_end if s_end < o_end else o_end
+            if common_start < common_end or\
+               (inclusive and common_start == common_end):
                 return Span(common_start, common_end)
             else:
                 return None
@@ -209,6 +235,10 @@ class Standoff(object):
     origin : educe.corpus.FileId, optional
         FileId of the document supporting this standoff.
     """
+    # no slots of our own: Standoff is mixed into list-based trees
+    # (nltk), whose layout would conflict with any slot declared here
+    __slots__ = ()
+
     def __init__(self, origin=None):
         self.origin = origin
 
@@ -221,7 +251,7 @@ class Standoff(object):
 
         Returns
         -------
-        res : list of Standoff or None
+        res : iterable of Standoff or None
             Annotations contained within this annotation ; None for
             terminal annotations.
         """
@@ -231,14 +261,16 @@ class Standoff(object):
         """Terminal annotations contained within this annotation.
 
         For terminal annotations, this is just the annotation itself.
-        For non-terminal annotations, this recursively fetches the
-        terminals.
+        For non-terminal annotations, this fetches the terminals of the
+        members, depth-first (with an explicit stack rather than by
+        recursion, so arbitrarily nested schemas are fine).
 
         Parameters
         ----------
-        seen : optional
-            List of already annotations that have already been seen, so
-            as to avoid returning duplicates.
+        seen : set of int, optional
+            Identities (`id()`) of the annotations that have already
+            been visited, so as to avoid returning duplicates. This set
+            is updated as the walk proceeds.
 
         Returns
         -------
@@ -246,11 +278,36 @@ class Standoff(object):
             List of terminal annotations for this annotation.
         """
         my_members = self._members()
+        if seen is None:
+            if my_members is None:
+                # a terminal is its own (only) terminal
+                return [self]
+            seen = set()
+        key = id(self)
+        if key in seen:
+            return []
+        seen.add(key)
         if my_members is None:
             return [self]
-        seen = seen or []
-        return chain.from_iterable([m._terminals(seen=seen + my_members)
-                                    for m in my_members if m not in seen])
+        res = []
+        # stack of iterators over the members of the nodes being walked
+        stack = [iter(my_members)]
+        while stack:
+            for node in stack[-1]:
+                key = id(node)
+                if key in seen:
+                    continue
+                seen.add(key)
+                node_members = node._members()
+                if node_members is None:
+                    res.append(node)
+                else:
+                    # walk the members of node before its next siblings
+                    stack.append(iter(node_members))
+                    break
+            else:
+                stack.pop()
+        return res
 
     def text_span(self):
         """
@@ -326,6 +383,9 @@ class Annotation(Standoff):
     * type:     some key label (we call a type)
     * features: an attribute to value dictionary
     """
+    __slots__ = ('origin', '_anno_id', 'span', 'type', 'features',
+                 'metadata', '_identifier_cache')
+
     def __init__(self, anno_id, span, atype, features, metadata=None,
                  origin=None):
         """Init method.
@@ -346,12 +406,13 @@ class Annotation(Standoff):
             FileId of the document that supports this annotation.
         """
         Standoff.__init__(self, origin)
-        self.origin = origin
         self._anno_id = anno_id
         self.span = span
-        self.type = atype
+        # types come from a small vocabulary: share one string per type
+        self.type = intern(atype) if type(atype) is str else atype
         self.features = features
         self.metadata = metadata
+        self._identifier_cache = None
 
     def __lt__(self, other):
         return self._anno_id < other._anno_id
@@ -390,10 +451,17 @@ class Annotation(Standoff):
         (and what we mean by safer)
         """
         local_id = self._anno_id
-        if self.origin is None:
+        origin = self.origin
+        if origin is None:
             return local_id
-        else:
-            return self.origin.mk_global_id(local_id)
+        # memoized along with the origin and local id it was built from,
+        # so that reassigning either one invalidates it
+        cache = getattr(self, '_identifier_cache', None)
+        if (cache is None or cache[0] is not origin or
+                cache[1] is not local_id):
+            cache = (origin, local_id, origin.mk_global_id(local_id))
+            self._identifier_cache = cache
+        return cache[2]
 
 
 class Unit(Annotation):
@@ -402,6 +470,7 @@ class Unit(Annotation):
     An annotation over a span of text.
 
     """
+    __slots__ = ()
 
     def __init__(self, unit_id, span, utype, features, metadata=None,
                  origin=None):
@@ -435,14 +504,14 @@ class Unit(Annotation):
         objects that may coincidentally fall in the same span.
         So how much do you trust your IDs?
         """
-        if self.origin is None:
-            ostuff = []
+        span = self.span
+        origin = self.origin
+        if origin is None:
+            return '%d:%d' % (span.char_start, span.char_end)
         else:
-            ostuff = [self.origin.doc,
-                      self.origin.subdoc,
-                      self.origin.stage]
-            span = self.span
-        return ":".join(ostuff + [str(span.char_start), str(span.char_end)])
+            return '%s:%s:%s:%d:%d' % (origin.doc, origin.subdoc,
+                                       origin.stage,
+                                       span.char_start, span.char_end)
 
 
 class Relation(Annotation):
@@ -456,6 +525,7 @@ class Relation(Annotation):
     documents and thus their relations).
 
     """
+    __slots__ = ('source', 'target')
 
     def __init__(self, rel_id, span, rtype, features, metadata=None):
         """Init method.
@@ -475,10 +545,7 @@ class Relation(Annotation):
         """
         Annotation.__init__(self, rel_id, span, rtype, features, metadata)
         self.source = None  # to be defined in fleshout
-        'source annotation; will be defined by fleshout'
-
         self.target = None
-        'target annotation; will be defined by fleshout'
 
     def _members(self):
         return [self.source, self.target]
@@ -490,17 +557,20 @@ class Relation(Annotation):
         """
         source_span = self.span.t1
         target_span = self.span.t2
-        if source_span not in objects:
+        try:
+            source = objects[source_span]
+        except KeyError:
             oops = 'There is no annotation with id %s [relation source]' %\
                 source_span
             raise Exception(oops)
-        elif target_span not in objects:
+        try:
+            target = objects[target_span]
+        except KeyError:
             oops = 'There is no annotation with id %s [relation target]' %\
                 target_span
             raise Exception(oops)
-        else:
-            self.source = objects[source_span]
-            self.target = objects[target_span]
+        self.source = source
+        self.target = target
 
 
 class Schema(Annotation):
@@ -513,13 +583,18 @@ class Schema(Annotation):
     :type units: set(string)
     :type relations: set(string)
     :type schemas: set(string)
+
+    The `span` of a schema is the tuple of all its member ids (the
+    union of the three sets, so without duplicates).
     """
+    __slots__ = ('units', 'relations', 'schemas', 'members')
+
     def __init__(self, rel_id, units, relations, schemas, stype,
                  features, metadata=None):
         self.units = units
         self.relations = relations
         self.schemas = schemas
-        member_ids = units | relations | schemas
+        member_ids = tuple(units | relations | schemas)
         self.members = None  # to be defined :-/
         Annotation.__init__(self, rel_id, member_ids, stype,
                             features, metadata)
@@ -539,12 +614,12 @@ class Schema(Annotation):
         Given a dictionary mapping ids to annotation objects, set this
         schema's `members` field to point to the appropriate objects
         """
-        self.members = []
-        for i in self.span:
-            if i not in objects:
-                oops = 'There is no annotation with id %s [schema member]' % i
-                raise Exception(oops)
-            self.members.append(objects[i])
+        try:
+            self.members = [objects[i] for i in self.span]
+        except KeyError as err:
+            oops = 'There is no annotation with id %s [schema member]' %\
+                err.args[0]
+            raise Exception(oops)
 
 
 class Document(Standoff):
@@ -559,18 +634,10 @@ class Document(Standoff):
         self.units = units
         self.relations = relations
         self.schemas = schemas
-        objects = {}
-
-        for i in self.units:
-            objects[i.local_id()] = i
-        for i in self.relations:
-            objects[i.local_id()] = i
-        for i in self.schemas:
-            objects[i.local_id()] = i
+        objects = {x._anno_id: x
+                   for x in chain(self.units, self.relations, self.schemas)}
 
-        for anno in self.relations:
-            anno.fleshout(objects)
-        for anno in self.schemas:
+        for anno in chain(self.relations, self.schemas):
             anno.fleshout(objects)
 
         self._text = text
@@ -581,8 +648,15 @@ class Document(Standoff):
         """
         return self.units + self.relations + self.schemas
 
+    def iter_annotations(self):
+        """
+        Iterator over all annotations associated with this document,
+        in the same order as `annotations` but without building a list
+        """
+        return chain(self.units, self.relations, self.schemas)
+
     def _members(self):
-        return self.annotations()
+        return self.iter_annotations()
 
     def fleshout(self, origin):
         """
@@ -599,7 +673,7 @@ class Document(Standoff):
         :type origin: :py:class:`educe.corpus.FileId`
         """
         self.origin = origin
-        for anno in self.annotations():
+        for anno in self.iter_annotations():
             anno.origin = origin
 
     def global_id(self, local_id):
@@ -612,14 +686,93 @@ class Document(Standoff):
         else:
             return self.origin.mk_global_id(local_id)
 
+    def _unit_offsets(self):
+        """Start and end offsets of the units, as parallel arrays.
+
+        The arrays are built anew on each call, so they always reflect
+        the current units and their spans.
+
+        Returns
+        -------
+        starts : array of int
+            Start offset of each unit of `self.units`.
+        ends : array of int
+            End offset of each unit of `self.units`.
+        """
+        units = self.units
+        nb_units = len(units)
+        starts = np.fromiter((u.span.char_start for u in units),
+                             dtype=np.int32, count=nb_units)
+        ends = np.fromiter((u.span.char_end for u in units),
+                           dtype=np.int32, count=nb_units)
+        return starts, ends
+
+    def units_enclosed_by(self, span):
+        """Indices of the units whose span is enclosed by a span.
+
+        This tests all the units of the document at once, which is
+        faster than calling `Span.encloses` on each unit.
+
+        Parameters
+        ----------
+        span : Span
+            Enclosing span.
+
+        Returns
+        -------
+        res : array of int
+            Indices in `self.units` of the units enclosed by `span`.
+        """
+        return self._units_matching('encloses', numpy_encloses, span)
+
+    def units_overlapping(self, span):
+        """Indices of the units whose span overlaps with a span.
+
+        Overlap is understood as in `Span.overlaps` (non-inclusive).
+
+        Parameters
+        ----------
+        span : Span
+            Query span.
+
+        Returns
+        -------
+        res : array of int
+            Indices in `self.units` of the units overlapping `span`.
+        """
+        return self._units_matching('overlaps', numpy_overlaps, span)
+
+    def _units_matching(self, name, small_kernel, span):
+        """Indices of the units for which a kernel holds.
+
+        When the document has at least `_KERNEL_MIN_UNITS` units, we
+        use the kernel `bulk_<name>` from `educe._annotation_kernels_jit`
+        (imported here, on first use) ; otherwise `small_kernel`.
+
+        Returns
+        -------
+        res : array of int
+            Indices in `self.units` of the units matching `span`.
+        """
+        starts, ends = self._unit_offsets()
+        if len(starts) < _KERNEL_MIN_UNITS:
+            kernel = small_kernel
+        else:
+            from educe import _annotation_kernels_jit
+            kernel = getattr(_annotation_kernels_jit, 'bulk_' + name)
+        out = np.empty(len(starts), dtype=np.bool_)
+        kernel(span.char_start, span.char_end, starts, ends, out)
+        return np.flatnonzero(out)
+
     def text(self, span=None):
         """
         Return the text associated with these annotations (or None),
         optionally limited to a span
         """
-        if self._text is None:
+        text = self._text
+        if text is None:
             return None
         elif span is None:
-            return self._text
+            return text
         else:
-            return self._text[span.char_start:span.char_end]
+            return text[span.char_start:span.char_end]
@@ -37,8 +37,11 @@ class GlozzOutputSettings(object):
     along the way for revision control, comparability, etc.
     """
     def __init__(self, feature_order, metadata_order):
-        self.fs_order = feature_order
-        self.md_order = metadata_order
+        self.fs_order = tuple(feature_order)
+        self.md_order = tuple(metadata_order)
+        # for membership tests in `ordered_keys`
+        self._fs_order_set = frozenset(self.fs_order)
+        self._md_order_set = frozenset(self.md_order)
 
 
 DEFAULT_OUTPUT_SETTINGS = GlozzOutputSettings([], [])
@@ -69,20 +72,26 @@ class GlozzDocument(Document):
             x.origin = origin
 
 
-def ordered_keys(preferred, d):
+def ordered_keys(preferred, d, preferred_set=None):
     """
     Keys from a dictionary starting with 'preferred' ones
     in the order of preference
+
+    `preferred_set` can optionally be given as a precomputed set of
+    the preferred keys, to speed up membership tests
     """
+    if preferred_set is None:
+        preferred_set = frozenset(preferred)
     return ([k for k in preferred if k in d] +
-            [k for k in d if k not in preferred])
+            [k for k in d if k not in preferred_set])
 
 
 def glozz_annotation_to_xml(self, tag='annotation',
                             settings=DEFAULT_OUTPUT_SETTINGS):
     meta_elm = ET.Element('metadata')
 
-    for k in ordered_keys(settings.md_order, self.metadata):
+    for k in ordered_keys(settings.md_order, self.metadata,
+                          settings._md_order_set):
         e = ET.Element(k)
         e.text = self.metadata[k]
         meta_elm.append(e)
@@ -91,7 +100,8 @@ def glozz_annotation_to_xml(self, tag='annotation',
     char_tag_elm = ET.Element('type')
     char_tag_elm.text = self.type
     char_tag_fs = ET.Element('featureSet')
-    for k in ordered_keys(settings.fs_order, self.features):
+    for k in ordered_keys(settings.fs_order, self.features,
+                          settings._fs_order_set):
         e = ET.Element('feature', name=k)
         e.text = self.features[k]
         char_tag_fs.append(e)
@@ -16,29 +16,6 @@ from .annotation import EDU
 from .ptb import align_edus_with_sentences
 
 
-# helpers for _align_with_doc_structure
-
-def containing(span):
-    """
-    span -> anno -> bool
-
-    if this annotation encloses the given span
-    """
-    return lambda x: x.text_span().encloses(span)
-
-
-def _filter0(pred, iterable):
-    """
-    First item that satisifies a predicate in a given
-    iterable, otherwise None
-    """
-    for item in iterable:
-        if pred(item):
-            return item
-    else:
-        return None
-
-
 # dirty temporary extraction from DocumentPlus
 def align_edus_with_paragraphs(doc_edus, doc_paras, text, strict=False):
     """Align EDUs with paragraphs, if any.
@@ -242,14 +219,27 @@ class DocumentPlus(object):
         else:
             edu2raw_sent = []
             edu2raw_sent.append(0)  # left padding
+            # offsets of the raw sentences, to find the (index of the)
+            # first raw sentence that encloses a span in one pass
+            rsent_spans = [x.text_span() for x in raw_sentences]
+            rsents_beg = np.array([x.char_start for x in rsent_spans])
+            rsents_end = np.array([x.char_end for x in rsent_spans])
+
+            def _enclosing_idx(span):
+                "Index of the first raw sentence enclosing span, or None"
+                encl_idc = np.flatnonzero(
+                    np.logical_and(rsents_beg <= span.char_start,
+                                   rsents_end >= span.char_end))
+                return int(encl_idc[0]) if encl_idc.size else None
+
             # align the other EDUs
             for edu in edus[1:]:
                 espan = edu.text_span()
                 # find enclosing raw sentence
-                sent = _filter0(containing(espan), raw_sentences)
+                raw_sent_idx = _enclosing_idx(espan)
                 # sloppy EDUs happen; try shaving off some characters
                 # if we can't find a sentence
-                if sent is None:
+                if raw_sent_idx is None:
                     # DEBUG
                     if False:
                         print('WP ({}) : {}'.format(self.grouping, edu))
@@ -265,16 +255,15 @@ class DocumentPlus(object):
                     espan.char_end -= len(etext) - len(etext.rstrip())
                     etext = etext.rstrip()
                     # try again
-                    sent = _filter0(containing(espan), raw_sentences)
+                    raw_sent_idx = _enclosing_idx(espan)
                     # DEBUG
                     if False:
-                        if sent is None:
+                        if raw_sent_idx is None:
                             print('EP ({}): {}'.format(self.grouping, edu))
                     # end DEBUG
 
                 # update edu to sentence mapping
-                raw_sent_idx = (raw_sentences.index(sent) if sent is not None
-                                else None)  # TODO or -1 or ... ?
+                # TODO None or -1 or ... ?
                 edu2raw_sent.append(raw_sent_idx)
 
         self.edu2raw_sent = edu2raw_sent
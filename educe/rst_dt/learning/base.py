@@ -5,6 +5,7 @@ Basics for feature extraction
 from __future__ import print_function
 
 from functools import wraps
+from operator import attrgetter
 
 import numpy as np
 
@@ -134,6 +135,16 @@ def lowest_common_parent(treepositions):
 # end of tree utils
 
 
+# accessors for the basic features of tokens
+_tag = attrgetter('tag')
+_word = attrgetter('word')
+
+
+def _div3(idx):
+    """Bucket an EDU offset (or None) by groups of 3"""
+    return idx // 3 if idx is not None else None
+
+
 class DocumentPlusPreprocessor(object):
     """Preprocessor for feature extraction on a DocumentPlus
 
@@ -295,6 +306,9 @@ class DocumentPlusPreprocessor(object):
         # sentence
         res['edu_idx_in_sent'] = idxes_in_sent[0]
         res['edu_rev_idx_in_sent'] = rev_idxes_in_sent[0]
+        # bucketed versions, used by pair features
+        res['edu_idx_in_sent_div3'] = _div3(idxes_in_sent[0])
+        res['edu_rev_idx_in_sent_div3'] = _div3(rev_idxes_in_sent[0])
         res['sent_idx'] = 0
         res['sent_rev_idx'] = len(trees) - 1  # NEW
         # para
@@ -308,6 +322,9 @@ class DocumentPlusPreprocessor(object):
         edu_infos.append(res)
 
         # regular EDUs
+        # tree positions of the leaves of each syntactic tree, computed
+        # once per tree rather than once per EDU
+        tree_leaves = dict()
         for edu_idx, edu in enumerate(edus[1:], start=1):
             res = dict()
             res['edu'] = edu
@@ -331,8 +348,8 @@ class DocumentPlusPreprocessor(object):
                     toks = [tt for tt in toks if token_filter(tt)]
                 # store information
                 res['tokens'] = toks
-                res['tags'] = [tok.tag for tok in toks]
-                res['words'] = [tok.word for tok in toks]
+                res['tags'] = list(map(_tag, toks))
+                res['words'] = list(map(_word, toks))
                 # EXPERIMENTAL: Brown clusters
                 if word2clust is not None:
                     res['brown_clusters'] = [word2clust[w]
@@ -354,6 +371,10 @@ class DocumentPlusPreprocessor(object):
             res['edu_idx_in_sent'] = idxes_in_sent[edu_idx]
             # aka num_edus_to_sent_end aka revOffset
             res['edu_rev_idx_in_sent'] = rev_idxes_in_sent[edu_idx]
+            # bucketed versions, used by pair features
+            res['edu_idx_in_sent_div3'] = _div3(idxes_in_sent[edu_idx])
+            res['edu_rev_idx_in_sent_div3'] = _div3(
+                rev_idxes_in_sent[edu_idx])
 
             # position of paragraph containing EDU in doc
             # aka paragraphID
@@ -382,9 +403,14 @@ class DocumentPlusPreprocessor(object):
                     pheads = lex_heads[tree_idx]
                     # tree positions (in the syn tree) of the words of
                     # the EDU
-                    tpos_leaves_edu = [x for x
-                                       in ptree.treepositions('leaves')
-                                       if ptree[x].overlaps(edu)]
+                    try:
+                        leaves = tree_leaves[tree_idx]
+                    except KeyError:
+                        leaves = [(x, ptree[x]) for x
+                                  in ptree.treepositions('leaves')]
+                        tree_leaves[tree_idx] = leaves
+                    tpos_leaves_edu = [x for x, leaf in leaves
+                                       if leaf.overlaps(edu)]
                     tpos_words = set(tpos_leaves_edu)
                     res['tpos_words'] = tpos_words
                     edu_head = find_edu_head(ptree, pheads, tpos_words)
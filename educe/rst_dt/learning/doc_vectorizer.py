@@ -186,6 +186,46 @@ def re_emit(feats, suff):
         yield (fn + suff, fv)
 
 
+def one_hot_encode(feats, separator):
+    """One-hot encode the string and tuple values in feats.
+
+    Parameters
+    ----------
+    feats : iterable of (string, value)
+        Features.
+    separator : string
+        Separator between the feature name and value in the name of
+        the encoded feature.
+
+    Returns
+    -------
+    oh_feats : list of (string, value)
+        Features where each string or tuple value `v` of a feature
+        `f` is replaced with a feature `f + separator + v` of value 1.
+    """
+    oh_feats = []
+    for f, v in feats:
+        if isinstance(v, tuple):
+            f = f + separator + str(v)
+            v = 1
+        elif isinstance(v, (str, unicode)):
+            # NEW explicitly replace with regular spaces the
+            # non-breaking spaces that appear in CoreNLP output
+            # for fractions of a dollar in stock prices,
+            # e.g. "100 3/32" ;
+            # non-breaking spaces might appear elsewhere ;
+            # svmlight format expects ascii characters so it makes
+            # some sense to replace and convert to ascii here
+            if isinstance(v, unicode):
+                v2 = v.replace(u'\xa0', u' ')
+                v = v2.encode('utf-8')
+            # end NEW
+            f = f + separator + v
+            v = 1
+        oh_feats.append((f, v))
+    return oh_feats
+
+
 class DocumentCountVectorizer(object):
     """Fancy vectorizer for the RST-DT treebank.
 
@@ -285,8 +325,15 @@ class DocumentCountVectorizer(object):
         feat_vecs = []
         # generate EDU pairs
         edu_pairs = self.instance_generator(doc)
-        # cache single EDU features
+        # cache single EDU features, and their re-emitted versions as
+        # gov (EDU1) and dep (EDU2) ; cached dicts are shared between
+        # pairs so they must not be modified
         sf_cache = dict()
+        sf1_cache = dict()
+        sf2_cache = dict()
+        # ... and their one-hot encoded versions
+        oh1_cache = dict()
+        oh2_cache = dict()
 
         for edu1, edu2 in edu_pairs:
             edu1_num = edu1.num
@@ -298,7 +345,6 @@ class DocumentCountVectorizer(object):
             else:
                 edul_num = edu2_num
                 edur_num = edu1_num
-            bwn_nums = range(edul_num + 1, edur_num)
             # end WIP interval
 
             feat_dict = dict()
@@ -314,36 +360,47 @@ class DocumentCountVectorizer(object):
                 para_info2 = para_infos[edu2para[edu2_num]]
             except TypeError:
                 para_info2 = None
-            # ... and for the EDUs in between (WIP interval)
-            edu_info_bwn = [edu_infos[i] for i in bwn_nums]
+            # ... and for the EDUs in between (WIP interval) ;
+            # edu_infos is indexed by EDU num, so this is a plain slice
+            edu_info_bwn = edu_infos[edul_num + 1:edur_num]
 
             # gov EDU
-            if edu1_num not in sf_cache:
-                sf_cache[edu1_num] = dict(sing_extract(
-                    doc, edu_info1, para_info1))
-            feat_dict['EDU1'] = dict(sf_cache[edu1_num])
+            try:
+                feats_edu1 = sf_cache[edu1_num]
+            except KeyError:
+                feats_edu1 = dict(sing_extract(doc, edu_info1, para_info1))
+                sf_cache[edu1_num] = feats_edu1
             # dep EDU
-            if edu2_num not in sf_cache:
-                sf_cache[edu2_num] = dict(sing_extract(
-                    doc, edu_info2, para_info2))
-            feat_dict['EDU2'] = dict(sf_cache[edu2_num])
+            try:
+                feats_edu2 = sf_cache[edu2_num]
+            except KeyError:
+                feats_edu2 = dict(sing_extract(doc, edu_info2, para_info2))
+                sf_cache[edu2_num] = feats_edu2
             # pair + in between
             feat_dict['pair'] = dict(pair_extract(
                 doc, edu_info1, edu_info2, edu_info_bwn))
             # NEW
             # product features
-            feat_dict['pair'].update(feat_prod(feat_dict['EDU1'],
-                                               feat_dict['EDU2'],
+            feat_dict['pair'].update(feat_prod(feats_edu1,
+                                               feats_edu2,
                                                feat_dict['pair']))
             # combine features
-            feat_dict['pair'].update(feat_comb(feat_dict['EDU1'],
-                                               feat_dict['EDU2'],
+            feat_dict['pair'].update(feat_comb(feats_edu1,
+                                               feats_edu2,
                                                feat_dict['pair']))
-            # add suffix to single EDU features
-            feat_dict['EDU1'] = dict(re_emit(feat_dict['EDU1'].items(),
-                                             '_EDU1'))
-            feat_dict['EDU2'] = dict(re_emit(feat_dict['EDU2'].items(),
-                                             '_EDU2'))
+            # add suffix to single EDU features, once per EDU
+            try:
+                feat_dict['EDU1'] = sf1_cache[edu1_num]
+            except KeyError:
+                feat_dict['EDU1'] = dict(re_emit(feats_edu1.items(),
+                                                 '_EDU1'))
+                sf1_cache[edu1_num] = feat_dict['EDU1']
+            try:
+                feat_dict['EDU2'] = sf2_cache[edu2_num]
+            except KeyError:
+                feat_dict['EDU2'] = dict(re_emit(feats_edu2.items(),
+                                                 '_EDU2'))
+                sf2_cache[edu2_num] = feat_dict['EDU2']
 
             # split feat space
             if split_feat_space is not None:
@@ -358,37 +415,38 @@ class DocumentCountVectorizer(object):
                     keep_original=False,
                     split_criterion=split_feat_space)
                 feat_dict['EDU1'], feat_dict['EDU2'], feat_dict['pair'] = fds
-
-            # convert to list
-            feats = list(itertools.chain.from_iterable(
-                fd.items() for fd in feat_dict.values()))
+                # apply one hot encoding for all string values
+                oh_feats = one_hot_encode(
+                    itertools.chain.from_iterable(
+                        fd.items() for fd in feat_dict.values()),
+                    separator)
+            else:
+                # single EDU features do not depend on the pair, so
+                # they are one-hot encoded once per EDU
+                try:
+                    oh_edu1 = oh1_cache[edu1_num]
+                except KeyError:
+                    oh_edu1 = one_hot_encode(feat_dict['EDU1'].items(),
+                                             separator)
+                    oh1_cache[edu1_num] = oh_edu1
+                try:
+                    oh_edu2 = oh2_cache[edu2_num]
+                except KeyError:
+                    oh_edu2 = one_hot_encode(feat_dict['EDU2'].items(),
+                                             separator)
+                    oh2_cache[edu2_num] = oh_edu2
+                oh_feats = (one_hot_encode(feat_dict['pair'].items(),
+                                           separator) +
+                            oh_edu1 + oh_edu2)
             # end NEW
 
-            # apply one hot encoding for all string values
-            oh_feats = []
-            for f, v in feats:
-                if isinstance(v, tuple):
-                    f = '{}{}{}'.format(f, separator, str(v))
-                    v = 1
-                elif isinstance(v, (str, unicode)):
-                    # NEW explicitly replace with regular spaces the
-                    # non-breaking spaces that appear in CoreNLP output
-                    # for fractions of a dollar in stock prices,
-                    # e.g. "100 3/32" ;
-                    # non-breaking spaces might appear elsewhere ;
-                    # svmlight format expects ascii characters so it makes
-                    # some sense to replace and convert to ascii here
-                    if isinstance(v, unicode):
-                        v2 = v.replace(u'\xa0', u' ')
-                        v = v2.encode('utf-8')
-                    # end NEW
-                    f = '{}{}{}'.format(f, separator, v)
-                    v = 1
-                oh_feats.append((f, v))
-            # sum values of entries with same feature name
-            feat_cnt = Counter()
+            # sum values of entries with same feature name ;
+            # a plain dict with a bound get avoids going through
+            # Counter.__missing__ for every new feature name
+            feat_cnt = dict()
+            get_cnt = feat_cnt.get
             for fn, fv in oh_feats:
-                feat_cnt[fn] += fv
+                feat_cnt[fn] = get_cnt(fn, 0) + fv
             feat_vec = feat_cnt.items()  # non-deterministic order
             # could be : feat_vec = sorted(feat_cnt.items())
             feat_vecs.append(feat_vec)
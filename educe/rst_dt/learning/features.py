@@ -203,12 +203,18 @@ def extract_pair_pos_tags(doc, edu_info1, edu_info2):
         yield ('ptb_pos_tag_first_pairs', (tags1[0], tags2[0]))
 
 
-def build_pair_feature_extractor():
+def build_pair_feature_extractor(lecsie_data_dir=None):
     """Build the feature extractor for pairs of EDUs
 
     TODO: properly emit features on single EDUs ;
     they are already stored in sf_cache, but under (slightly) different
     names
+
+    Parameters
+    ----------
+    lecsie_data_dir : string, optional
+        Ignored ; accepted for compatibility with the signature used
+        by `DocumentCountVectorizer`.
     """
     funcs = []
 
@@ -211,7 +211,7 @@ def extract_single_length(doc, edu_info, para_info):
         return
 
     yield ('num_tokens', len(words))
-    yield ('num_tokens_div5', len(words) / 5)
+    yield ('num_tokens_div5', len(words) // 5)
 
 
 # features on document structure
@@ -264,7 +264,7 @@ def extract_single_para(doc, edu_info, para_info):
     else:
         if para_idx is not None:
             yield ('paragraph_id', para_idx)
-            yield ('paragraph_id_div5', para_idx / 5)
+            yield ('paragraph_id_div5', para_idx // 5)
     # * from end
     try:
         para_rev_idx = edu_info['para_rev_idx']
@@ -557,7 +557,7 @@ def extract_pair_para(doc, edu_info1, edu_info2, edu_info_bwn):
             yield ('same_para', True)
 
         # TODO: remove and see what happens
-        yield ('num_paragraphs_between_div3', (para_id1 - para_id2) / 3)
+        yield ('num_paragraphs_between_div3', (para_id1 - para_id2) // 3)
 
 
 def extract_pair_sent(doc, edu_info1, edu_info2, edu_info_bwn):
@@ -583,7 +583,7 @@ def extract_pair_sent(doc, edu_info1, edu_info2, edu_info_bwn):
         elif sent_id1 > sent_id2:  # left attachment
             yield ('sent_left', True)
 
-        yield ('sentence_id_diff_div3', dist_sent / 3)
+        yield ('sentence_id_diff_div3', dist_sent // 3)
 
     # offset features
     offset1 = edu_info1['edu_idx_in_sent']
@@ -592,9 +592,9 @@ def extract_pair_sent(doc, edu_info1, edu_info2, edu_info_bwn):
         # offset diff
         offset_diff = offset1 - offset2
         yield ('offset_diff', offset_diff)
-        yield ('offset_diff_div3', offset_diff / 3)
+        yield ('offset_diff_div3', offset_diff // 3)
         # offset pair
-        yield ('offset_div3_pair', (offset1 / 3, offset2 / 3))
+        yield ('offset_div3_pair', (offset1 // 3, offset2 // 3))
 
     # rev_offset features
     rev_offset1 = edu_info1['edu_rev_idx_in_sent']
@@ -602,8 +602,8 @@ def extract_pair_sent(doc, edu_info1, edu_info2, edu_info_bwn):
     if rev_offset1 is not None and rev_offset2 is not None:
         rev_offset_diff = rev_offset1 - rev_offset2
         yield ('rev_offset_diff', rev_offset_diff)
-        yield ('rev_offset_diff_div3', rev_offset_diff / 3)
-        yield ('rev_offset_div3_pair', (rev_offset1 / 3, rev_offset2 / 3))
+        yield ('rev_offset_diff_div3', rev_offset_diff // 3)
+        yield ('rev_offset_div3_pair', (rev_offset1 // 3, rev_offset2 // 3))
 
     # revSentenceID
     rev_sent_id1 = edu_info1['edu_rev_idx_in_para']
@@ -611,7 +611,7 @@ def extract_pair_sent(doc, edu_info1, edu_info2, edu_info_bwn):
     if rev_sent_id1 is not None and rev_sent_id2 is not None:
         yield ('rev_sentence_id_diff', rev_sent_id1 - rev_sent_id2)
         yield ('rev_sentence_id_diff_div3',
-               (rev_sent_id1 - rev_sent_id2) / 3)
+               (rev_sent_id1 - rev_sent_id2) // 3)
 
 
 # syntax
@@ -958,7 +958,7 @@ def combine_features(feats_g, feats_d, feats_gd):
     # length, both EDUs
     try:
         cf['num_tokens_diff_div5'] = (feats_g['num_tokens'] -
-                                      feats_d['num_tokens']) / 5
+                                      feats_d['num_tokens']) // 5
     except KeyError:
         pass
 
@@ -978,25 +978,25 @@ def combine_features(feats_g, feats_d, feats_gd):
     # not really linear combinations ... but this seems the least bad
     # place (for the time being)
     try:
-        cf['offset_div3_pair'] = (feats_g['num_edus_from_sent_start'] / 3,
-                                  feats_d['num_edus_from_sent_start'] / 3)
+        cf['offset_div3_pair'] = (feats_g['num_edus_from_sent_start'] // 3,
+                                  feats_d['num_edus_from_sent_start'] // 3)
     except KeyError:
         pass
 
     try:
-        cf['rev_offset_div3_pair'] = (feats_g['num_edus_to_sent_end'] / 3,
-                                      feats_d['num_edus_to_sent_end'] / 3)
+        cf['rev_offset_div3_pair'] = (feats_g['num_edus_to_sent_end'] // 3,
+                                      feats_d['num_edus_to_sent_end'] // 3)
     except KeyError:
         pass
 
     # recombinations of combined features just produced
     try:
-        cf['offset_diff_div3'] = cf['offset_diff'] / 3
+        cf['offset_diff_div3'] = cf['offset_diff'] // 3
     except KeyError:
         pass
 
     try:
-        cf['rev_offset_diff_div3'] = cf['rev_offset_diff'] / 3
+        cf['rev_offset_diff_div3'] = cf['rev_offset_diff'] // 3
     except KeyError:
         pass
 
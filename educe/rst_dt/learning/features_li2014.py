@@ -9,7 +9,9 @@ http://www.aclweb.org/anthology/P/P14/P14-1003.pdf
 """
 
 from collections import Counter
+from itertools import chain
 import re
+import string
 
 from educe.internalutil import treenode
 from educe.learning.keys import Substance
@@ -23,15 +25,20 @@ from .base import lowest_common_parent, DocumentPlusPreprocessor
 # filter tags and tokens as in Li et al.'s parser
 TT_PATTERN = r'.*[a-zA-Z_0-9].*'
 TT_FILTER = re.compile(TT_PATTERN)
+# TT_PATTERN only checks for the presence of a word character, which
+# a set test does without going through the regex engine
+_TT_CHARS = frozenset(string.ascii_letters + string.digits + '_')
 
 
 def token_filter_li2014(token):
     """Token filter defined in Li et al.'s parser.
 
     This filter only applies to tagged tokens.
+    For single-line tokens, it is equivalent to matching both the word
+    and the tag against `TT_FILTER`.
     """
-    return (TT_FILTER.match(token.word) is not None and
-            TT_FILTER.match(token.tag) is not None)
+    return (not _TT_CHARS.isdisjoint(token.word) and
+            not _TT_CHARS.isdisjoint(token.tag))
 
 
 def build_doc_preprocessor():
@@ -52,22 +59,6 @@ SINGLE_WORD = [
 ]
 
 
-def extract_single_word(doc, edu_info, para_info):
-    """word features for the EDU"""
-    try:
-        words = edu_info['words']
-    except KeyError:
-        return
-
-    if words:
-        yield ('ptb_word_first', words[0])
-        yield ('ptb_word_last', words[-1])
-
-    if len(words) > 1:
-        yield ('ptb_word_first2', (words[0], words[1]))
-        yield ('ptb_word_last2', (words[-2], words[-1]))
-
-
 SINGLE_POS = [
     ('ptb_pos_tag_first', Substance.DISCRETE),
     ('ptb_pos_tag_last', Substance.DISCRETE),
@@ -75,13 +66,33 @@ SINGLE_POS = [
 ]
 
 
-def extract_single_pos(doc, edu_info, para_info):
-    """POS features for the EDU"""
-    try:
-        tags = edu_info['tags']
-    except KeyError:
-        return
+SINGLE_LENGTH = [
+    ('num_tokens', Substance.DISCRETE),
+    ('num_tokens_div5', Substance.DISCRETE)
+]
+
+
+def extract_single_tokens(doc, edu_info, para_info):
+    """Word, POS and length features for the EDU.
+
+    These are the features declared in `SINGLE_WORD`, `SINGLE_POS` and
+    `SINGLE_LENGTH`, computed in a single pass over the basic features
+    of the EDU.
+    """
+    # a missing key only disables the features that depend on it
+    words = edu_info.get('words')
+    tags = edu_info.get('tags')
 
+    # word
+    if words:
+        yield ('ptb_word_first', words[0])
+        yield ('ptb_word_last', words[-1])
+
+    if words is not None and len(words) > 1:
+        yield ('ptb_word_first2', (words[0], words[1]))
+        yield ('ptb_word_last2', (words[-2], words[-1]))
+
+    # pos
     if tags:
         yield ('ptb_pos_tag_first', tags[0])
         yield ('ptb_pos_tag_last', tags[-1])
@@ -90,22 +101,10 @@ def extract_single_pos(doc, edu_info, para_info):
         for tag, occ in tag_cnt.items():
             yield ('POS_' + tag, occ)
 
-
-SINGLE_LENGTH = [
-    ('num_tokens', Substance.DISCRETE),
-    ('num_tokens_div5', Substance.DISCRETE)
-]
-
-
-def extract_single_length(doc, edu_info, para_info):
-    """Sentence features for the EDU"""
-    try:
-        words = edu_info['words']
-    except KeyError:
-        return
-
-    yield ('num_tokens', str(len(words)))
-    yield ('num_tokens_div5', str(len(words) / 5))
+    # length
+    if words is not None:
+        yield ('num_tokens', str(len(words)))
+        yield ('num_tokens_div5', str(len(words) // 5))
 
 
 # features on document structure
@@ -161,14 +160,14 @@ def extract_single_para(doc, edu_info, para_info):
     else:
         if para_idx is not None:
             yield ('paragraph_id', str(para_idx))
-            yield ('paragraph_id_div5', str(para_idx / 5))
+            yield ('paragraph_id_div5', str(para_idx // 5))
 
 
 # features on syntax
 # helper
 def get_syntactic_labels(doc, edu_info):
-    "Syntactic labels for this EDU"
-    result = []
+    "Syntactic labels for this EDU, with their number of occurrences"
+    result = Counter()
 
     try:
         tree_idx = edu_info['tkd_tree_idx']
@@ -180,27 +179,37 @@ def get_syntactic_labels(doc, edu_info):
 
     ptree = doc.tkd_trees[tree_idx]
 
-    edu = edu_info['edu']
-
     # get the tree position of the leaves of the syntactic tree that are in
-    # the EDU
-    tpos_leaves_edu = [tpos_leaf
-                       for tpos_leaf in ptree.treepositions('leaves')
-                       if ptree[tpos_leaf].overlaps(edu)]
+    # the EDU ; the preprocessor has already computed them (as a set),
+    # and sorting tree positions puts leaves back in left-to-right order
+    try:
+        tpos_leaves_edu = sorted(edu_info['tpos_words'])
+    except KeyError:
+        edu = edu_info['edu']
+        tpos_leaves_edu = [tpos_leaf
+                           for tpos_leaf in ptree.treepositions('leaves')
+                           if ptree[tpos_leaf].overlaps(edu)]
     # for each span of syntactic leaves in this EDU
+    if not tpos_leaves_edu:
+        return result
     tpos_parent = lowest_common_parent(tpos_leaves_edu)
+    if len(tpos_leaves_edu) == 1:
+        # a single leaf is its own lowest common parent, which is never
+        # met on the way up, so all its ancestors are added
+        leaf = tpos_leaves_edu[0]
+        for i in reversed(range(len(leaf))):
+            result[treenode(ptree[leaf[:i]])] += 1
+        return result
     # for each leaf between leftmost and rightmost, add its ancestors
-    # up to the lowest common parent
+    # up to the lowest common parent ; tpos_parent is a proper prefix
+    # of each leaf, so we can stop right above it
+    len_parent = len(tpos_parent)
+    top_lbl = 'top_' + treenode(ptree[tpos_parent])
     for leaf in tpos_leaves_edu:
-        for i in reversed(range(len(leaf))):
-            tpos_node = leaf[:i]
-            node = ptree[tpos_node]
-            node_lbl = treenode(node)
-            if tpos_node == tpos_parent:
-                result.append('top_' + node_lbl)
-                break
-            else:
-                result.append(node_lbl)
+        for i in range(len(leaf) - 1, len_parent, -1):
+            result[treenode(ptree[leaf[:i]])] += 1
+    # every leaf reaches the lowest common parent exactly once
+    result[top_lbl] += len(tpos_leaves_edu)
     return result
 
 
@@ -208,12 +217,16 @@ SINGLE_SYNTAX = [
     ('SYN', Substance.BASKET)
 ]
 
+# syntactic features are the most expensive to extract ; when enabled,
+# they are computed once per EDU as single EDU features, which
+# DocumentCountVectorizer caches for all the pairs the EDU is part of
+ENABLE_SYNTAX = False
+
 
 def extract_single_syntax(doc, edu_info, para_info):
     """syntactic features for the EDU"""
-    syn_labels = get_syntactic_labels(doc, edu_info)
-    if syn_labels is not None:
-        syn_cnt = Counter(syn_labels)
+    syn_cnt = get_syntactic_labels(doc, edu_info)
+    if syn_cnt is not None:
         for syn_lbl, occ in syn_cnt.items():
             yield ('SYN_' + syn_lbl, occ)
 
@@ -224,25 +237,22 @@ def build_edu_feature_extractor():
     """Build the feature extractor for single EDUs"""
     funcs = []
 
-    # word
-    funcs.append(extract_single_word)
-    # pos
-    funcs.append(extract_single_pos)
-    # length
-    funcs.append(extract_single_length)
+    # word, pos, length (fused version of extract_single_{word,pos,length})
+    funcs.append(extract_single_tokens)
     # para
     funcs.append(extract_single_para)
     # sent
     funcs.append(extract_single_sentence)
-    # syntax (disabled)
-    # funcs.append(extract_single_syntax)
+    # syntax (disabled by default, see ENABLE_SYNTAX)
+    if ENABLE_SYNTAX:
+        funcs.append(extract_single_syntax)
 
     def _extract_all(doc, edu_info, para_info):
         """inner helper because I am lost at sea here"""
-        # TODO do this in a cleaner manner
-        for fct in funcs:
-            for feat in fct(doc, edu_info, para_info):
-                yield feat
+        # chain the extractors directly rather than re-yielding each
+        # feature from an intermediate generator
+        return chain.from_iterable(fct(doc, edu_info, para_info)
+                                   for fct in funcs)
 
     # extractor
     feat_extractor = _extract_all
@@ -317,8 +327,8 @@ def extract_pair_length(doc, edu_info1, edu_info2):
     num_toks1 = len(words1)
     num_toks2 = len(words2)
 
-    yield ('num_tokens_div5_pair', (num_toks1 / 5, num_toks2 / 5))
-    yield ('num_tokens_diff_div5', str((num_toks1 - num_toks2) / 5))
+    yield ('num_tokens_div5_pair', (num_toks1 // 5, num_toks2 // 5))
+    yield ('num_tokens_diff_div5', str((num_toks1 - num_toks2) // 5))
 
 
 PAIR_PARA = [
@@ -344,8 +354,9 @@ def extract_pair_para(doc, edu_info1, edu_info2):
             first_para = 'same'
         yield ('first_paragraph', first_para)
 
-        yield ('num_paragraphs_between', str(para_id1 - para_id2))
-        yield ('num_paragraphs_between_div3', str((para_id1 - para_id2) / 3))
+        para_diff = para_id1 - para_id2
+        yield ('num_paragraphs_between', str(para_diff))
+        yield ('num_paragraphs_between_div3', str(para_diff // 3))
 
 
 PAIR_SENT = [
@@ -376,10 +387,12 @@ def extract_pair_sent(doc, edu_info1, edu_info2):
         pass
     else:
         if offset1 is not None and offset2 is not None:
-            yield ('offset_diff', str(offset1 - offset2))
-            yield ('offset_diff_div3', str((offset1 - offset2) / 3))
+            offset_diff = offset1 - offset2
+            yield ('offset_diff', str(offset_diff))
+            yield ('offset_diff_div3', str(offset_diff // 3))
             yield ('offset_pair', (offset1, offset2))
-            yield ('offset_div3_pair', (offset1 / 3, offset2 / 3))
+            yield ('offset_div3_pair', (edu_info1['edu_idx_in_sent_div3'],
+                                        edu_info2['edu_idx_in_sent_div3']))
 
     # rev_offset features
     try:
@@ -389,11 +402,13 @@ def extract_pair_sent(doc, edu_info1, edu_info2):
         pass
     else:
         if rev_offset1 is not None and offset2 is not None:
-            yield ('rev_offset_diff', str(rev_offset1 - rev_offset2))
-            yield ('rev_offset_diff_div3',
-                   str((rev_offset1 - rev_offset2) / 3))
+            rev_offset_diff = rev_offset1 - rev_offset2
+            yield ('rev_offset_diff', str(rev_offset_diff))
+            yield ('rev_offset_diff_div3', str(rev_offset_diff // 3))
             yield ('rev_offset_pair', (rev_offset1, rev_offset2))
-            yield ('rev_offset_div3_pair', (rev_offset1 / 3, rev_offset2 / 3))
+            yield ('rev_offset_div3_pair',
+                   (edu_info1['edu_rev_idx_in_sent_div3'],
+                    edu_info2['edu_rev_idx_in_sent_div3']))
 
     # lineID: distance of edu in EDUs from document start
     line_id1 = edu_info1['edu'].num - 1  # real EDU numbers are in [1..]
@@ -406,24 +421,31 @@ def extract_pair_sent(doc, edu_info1, edu_info2):
     if sent_id1 is not None and sent_id2 is not None:
         yield ('same_sentence',
                'same' if sent_id1 == sent_id2 else 'different')
-        yield ('sentence_id_diff', str(sent_id1 - sent_id2))
-        yield ('sentence_id_diff_div3', str((sent_id1 - sent_id2) / 3))
+        sent_id_diff = sent_id1 - sent_id2
+        yield ('sentence_id_diff', str(sent_id_diff))
+        yield ('sentence_id_diff_div3', str(sent_id_diff // 3))
 
     # revSentenceID
     rev_sent_id1 = edu_info1['edu_rev_idx_in_para']
     rev_sent_id2 = edu_info2['edu_rev_idx_in_para']
     if rev_sent_id1 is not None and rev_sent_id2 is not None:
-        yield ('rev_sentence_id_diff', str(rev_sent_id1 - rev_sent_id2))
-        yield ('rev_sentence_id_diff_div3',
-               str((rev_sent_id1 - rev_sent_id2) / 3))
+        rev_sent_id_diff = rev_sent_id1 - rev_sent_id2
+        yield ('rev_sentence_id_diff', str(rev_sent_id_diff))
+        yield ('rev_sentence_id_diff_div3', str(rev_sent_id_diff // 3))
 
 
-def build_pair_feature_extractor():
+def build_pair_feature_extractor(lecsie_data_dir=None):
     """Build the feature extractor for pairs of EDUs
 
     TODO: properly emit features on single EDUs ;
     they are already stored in sf_cache, but under (slightly) different
     names
+
+    Parameters
+    ----------
+    lecsie_data_dir : string, optional
+        Ignored ; accepted for compatibility with the signature used
+        by `DocumentCountVectorizer`.
     """
     funcs = []
 
@@ -443,10 +465,8 @@ def build_pair_feature_extractor():
 
     def _extract_all(doc, edu_info1, edu_info2, edu_info_bwn):
         """inner helper because I am lost at sea here, again"""
-        # TODO do this in a cleaner manner
-        for fct in funcs:
-            for feat in fct(doc, edu_info1, edu_info2):
-                yield feat
+        return chain.from_iterable(fct(doc, edu_info1, edu_info2)
+                                   for fct in funcs)
 
     # extractor
     feat_extractor = _extract_all
@@ -11,6 +11,8 @@ from os import path as fp
 import itertools
 import re
 
+import numpy as np
+
 # pylint: disable=no-name-in-module
 # pylint squawks about import error, but this seems to
 # be some sort of fancy lazily loaded module which it's
@@ -361,16 +363,35 @@ def align_edus_with_sentences(edus, syn_trees, strict=False):
     edu2sent: list(int or None)
         Map from EDU to (0-based) sentence index or None.
 
-    TODO
-    ----
-    * [ ] rewrite a faster version using numpy
+    Notes
+    -----
+    Syntactic trees come in document order and do not overlap, so
+    the trees that can overlap with a given EDU form a contiguous
+    range that we locate by binary search on the tree offsets.
+    If the trees are not sorted, we fall back to scanning them all.
     """
+    # spans of the (non-empty) trees, computed once for all EDUs
+    tree_idcs_ok = [t_idx for t_idx, tree in enumerate(syn_trees)
+                    if tree is not None]
+    tree_spans = [syn_trees[t_idx].text_span() for t_idx in tree_idcs_ok]
+    tree_begs = np.array([x.char_start for x in tree_spans], dtype=np.int64)
+    tree_ends = np.array([x.char_end for x in tree_spans], dtype=np.int64)
+    trees_sorted = (np.all(np.diff(tree_begs) >= 0) and
+                    np.all(np.diff(tree_ends) >= 0))
+
     edu2sent = []
     for edu in edus:
-        # find the syntactic trees that overlap with this EDU
-        tree_idcs = [t_idx
-                     for t_idx, tree in enumerate(syn_trees)
-                     if tree is not None and tree.overlaps(edu)]
+        espan = edu.text_span()
+        # find the syntactic trees that overlap with this EDU ;
+        # candidates are the trees that end at or after the start of
+        # the EDU and begin at or before its end
+        if trees_sorted:
+            lo = np.searchsorted(tree_ends, espan.char_start, side='left')
+            hi = np.searchsorted(tree_begs, espan.char_end, side='right')
+        else:
+            lo, hi = 0, len(tree_spans)
+        tree_idcs = [tree_idcs_ok[k] for k in range(lo, hi)
+                     if tree_spans[k].overlaps(espan)]
 
         if len(tree_idcs) == 1:
             tree_idx = tree_idcs[0]
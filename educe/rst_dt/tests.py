@@ -4,14 +4,22 @@ import os
 import random
 import unittest
 import copy
+from collections import Counter
 
+from nltk import Tree
+
+from educe.annotation import Span, Unit
 from educe.corpus import FileId
 from educe.rst_dt import annotation, parse, SimpleRSTTree
 from educe.rst_dt.dep2con import deptree_to_simple_rst_tree
 from educe.rst_dt.deptree import RstDepTree
+from educe.rst_dt.document_plus import DocumentPlus
+from educe.rst_dt.learning import features, features_li2014
+from educe.rst_dt.learning.doc_vectorizer import DocumentCountVectorizer
 from educe.rst_dt.parse import (parse_lightweight_tree,
                                 parse_rst_dt_tree,
                                 read_annotation_file)
+from educe.rst_dt.ptb import align_edus_with_sentences
 from educe.rst_dt.pseudo_relations import merge_same_units
 from ..internalutil import treenode
 
@@ -98,20 +106,23 @@ class RSTTest(unittest.TestCase):
         self.assertEqual(len(t_text), sp.char_end)
 
     def test_from_files(self):
-        for i in glob.glob('tests/*.dis'):
-            t = read_annotation_file(i, os.path.splitext(i)[0])
+        for name, t in self._test_trees().items():
+            if not name.endswith('.dis'):
+                continue
             self.assertEqual(len(t.text()), treenode(t).span.char_end)
 
     def _test_trees(self):
-        if not self._trees:
-            self._trees = {}
+        # populate the class-level cache, shared by all tests
+        if not RSTTest._trees:
+            trees = {}
             for i, tstr in enumerate([TSTR0, TSTR1]):
-                self._trees["tstr%d" % i] = parse.parse_rst_dt_tree(tstr)
+                trees["tstr%d" % i] = parse.parse_rst_dt_tree(tstr)
             for i in glob.glob('tests/*.dis'):
                 bname = os.path.basename(i)
                 tfile = os.path.splitext(i)[0]
-                self._trees[bname] = parse.read_annotation_file(i, tfile)
-        return self._trees
+                trees[bname] = read_annotation_file(i, tfile)
+            RSTTest._trees = trees
+        return RSTTest._trees
 
     def test_binarize(self):
         for _, tree in self._test_trees().items():
@@ -271,3 +282,215 @@ def test_merge_same_units():
     # assert t_su.leaves() == t_merged_ref.leaves()
     assert ([x.__dict__ for x in t_su.leaves()] ==
             [x.__dict__ for x in t_merged_ref.leaves()])
+
+
+def test_vectorizer_feature_sets():
+    "DocumentCountVectorizer accepts the basic and Li et al. 2014 sets"
+    # the vectorizer always passes lecsie_data_dir to the feature set
+    for feature_set in [features, features_li2014]:
+        vzer = DocumentCountVectorizer(lambda doc: [], feature_set)
+        assert vzer.pair_extract is not None
+
+
+def test_li2014_single_tokens():
+    "word, POS and length features on single EDUs"
+    def _feats(edu_info):
+        return sorted(features_li2014.extract_single_tokens(None, edu_info,
+                                                            None))
+
+    edu_info = {'words': ['Once', 'you', 'decide'],
+                'tags': ['RB', 'PRP', 'RB']}
+    assert _feats(edu_info) == sorted([
+        ('ptb_word_first', 'Once'),
+        ('ptb_word_last', 'decide'),
+        ('ptb_word_first2', ('Once', 'you')),
+        ('ptb_word_last2', ('you', 'decide')),
+        ('ptb_pos_tag_first', 'RB'),
+        ('ptb_pos_tag_last', 'RB'),
+        ('POS_RB', 2),
+        ('POS_PRP', 1),
+        ('num_tokens', '3'),
+        ('num_tokens_div5', '0'),
+    ])
+    assert _feats({'words': [], 'tags': []}) == [
+        ('num_tokens', '0'),
+        ('num_tokens_div5', '0'),
+    ]
+    # missing tags or words only disable the features that need them
+    assert _feats({'words': ['some', 'steps']}) == sorted([
+        ('ptb_word_first', 'some'),
+        ('ptb_word_last', 'steps'),
+        ('ptb_word_first2', ('some', 'steps')),
+        ('ptb_word_last2', ('some', 'steps')),
+        ('num_tokens', '2'),
+        ('num_tokens_div5', '0'),
+    ])
+    assert _feats({'tags': ['DT']}) == sorted([
+        ('ptb_pos_tag_first', 'DT'),
+        ('ptb_pos_tag_last', 'DT'),
+        ('POS_DT', 1),
+    ])
+    assert _feats({}) == []
+
+
+# ---------------------------------------------------------------------
+# alignments and syntactic labels: compare with straightforward
+# implementations on random inputs
+# ---------------------------------------------------------------------
+
+def _unit(start, end):
+    "a stand-in for EDUs, sentences, trees or tokens"
+    return Unit('u', Span(start, end), 'test', {})
+
+
+def _random_unit(rng, text_len, min_len=0):
+    start = rng.randint(0, text_len - min_len)
+    return _unit(start, rng.randint(start + min_len, text_len))
+
+
+def _naive_edu2raw_sent(text, edus, raw_sentences):
+    "first raw sentence enclosing each EDU, retrying with a shaved EDU"
+    def _enclosing(span):
+        for i, sent in enumerate(raw_sentences):
+            if sent.text_span().encloses(span):
+                return i
+        return None
+
+    res = [0]
+    for edu in edus[1:]:
+        espan = edu.text_span()
+        idx = _enclosing(espan)
+        if idx is None:
+            start = espan.char_start + 1
+            end = espan.char_end - 1
+            etext = text[start:end]
+            start += len(etext) - len(etext.lstrip())
+            etext = etext.lstrip()
+            end -= len(etext) - len(etext.rstrip())
+            idx = _enclosing(Span(start, end))
+        res.append(idx)
+    return res
+
+
+def test_align_with_doc_structure():
+    "raw sentences aligned with EDUs, as with a linear scan"
+    rng = random.Random(0)
+    for _ in range(50):
+        text = ''.join(rng.choice('ab  ') for _ in range(80))
+        doc = DocumentPlus.__new__(DocumentPlus)
+        doc.grouping = 'test'
+        doc.text = text
+        doc.paragraphs = None
+        doc.raw_sentences = ([_unit(0, 0)] +
+                             [_random_unit(rng, len(text))
+                              for _ in range(rng.randint(0, 8))])
+        doc.edus = ([_unit(0, 0)] +
+                    [_random_unit(rng, len(text))
+                     for _ in range(rng.randint(1, 10))])
+        doc.align_with_doc_structure()
+        assert doc.edu2raw_sent == _naive_edu2raw_sent(text, doc.edus,
+                                                       doc.raw_sentences)
+
+
+def _naive_edu2sent(edus, syn_trees):
+    "sentence of each EDU with a scan over all the trees (non strict)"
+    res = []
+    for edu in edus:
+        tree_idcs = [t_idx for t_idx, tree in enumerate(syn_trees)
+                     if tree is not None and tree.overlaps(edu)]
+        if len(tree_idcs) == 1:
+            res.append(tree_idcs[0])
+        elif not tree_idcs:
+            res.append(None)
+        else:
+            ovlaps = [syn_trees[t_idx].overlaps(edu).length()
+                      for t_idx in tree_idcs]
+            res.append(tree_idcs[ovlaps.index(max(ovlaps))])
+    return res
+
+
+def test_align_edus_with_sentences():
+    "EDUs aligned with sentences, sorted or not, as with a linear scan"
+    rng = random.Random(0)
+    for _ in range(300):
+        # trees in document order, sometimes overlapping or empty, with
+        # holes ; short texts so that boundaries often coincide
+        trees = sorted((_random_unit(rng, 20)
+                        for _ in range(rng.randint(0, 8))),
+                       key=lambda x: x.span)
+        trees = [None if rng.random() < 0.2 else x for x in trees]
+        if rng.random() < 0.2:
+            rng.shuffle(trees)
+        edus = [_random_unit(rng, 20, min_len=1)
+                for _ in range(rng.randint(1, 10))]
+        assert (align_edus_with_sentences(edus, trees) ==
+                _naive_edu2sent(edus, trees))
+
+
+def _random_tree(rng, offsets, depth=0):
+    "random syntactic tree, whose leaves are tokens in document order"
+    label = rng.choice(['S', 'NP', 'VP', 'PP'])
+    kids = []
+    for _ in range(rng.randint(1, 3)):
+        if depth > 3 or rng.random() < 0.4:
+            start = next(offsets)
+            kids.append(_unit(start, start + 3))
+        else:
+            kids.append(_random_tree(rng, offsets, depth + 1))
+    return Tree(label, kids)
+
+
+def _naive_syntactic_labels(ptree, edu):
+    "labels on the way up from each leaf of the EDU to their common parent"
+    tpos_leaves = [tpos for tpos in ptree.treepositions('leaves')
+                   if ptree[tpos].overlaps(edu)]
+    result = []
+    if not tpos_leaves:
+        return result
+    tpos_parent = tpos_leaves[0]
+    for tpos in tpos_leaves[1:]:
+        i = 0
+        while (i < len(tpos_parent) and i < len(tpos) and
+               tpos_parent[i] == tpos[i]):
+            i += 1
+        tpos_parent = tpos_parent[:i]
+    for leaf in tpos_leaves:
+        for i in reversed(range(len(leaf))):
+            tpos_node = leaf[:i]
+            if tpos_node == tpos_parent and len(tpos_leaves) > 1:
+                result.append('top_' + treenode(ptree[tpos_node]))
+                break
+            result.append(treenode(ptree[tpos_node]))
+    return result
+
+
+class _FakeDoc(object):
+    "document with just syntactic trees"
+    def __init__(self, trees):
+        self.tkd_trees = trees
+
+
+def test_get_syntactic_labels():
+    "syntactic labels of EDUs, with or without precomputed leaves"
+    rng = random.Random(0)
+    for _ in range(100):
+        ptree = _random_tree(rng, iter(range(0, 1000, 4)))
+        leaves = ptree.leaves()
+        first = rng.randint(0, len(leaves) - 1)
+        last = rng.randint(first, len(leaves) - 1)
+        edus = [_unit(leaves[first].span.char_start,
+                      leaves[last].span.char_end),
+                # between two tokens
+                _unit(leaves[first].span.char_end,
+                      leaves[first].span.char_end + 1)]
+        doc = _FakeDoc([None, ptree])
+        for edu in edus:
+            expected = Counter(_naive_syntactic_labels(ptree, edu))
+            edu_info = {'edu': edu, 'tkd_tree_idx': 1}
+            assert (features_li2014.get_syntactic_labels(doc, edu_info) ==
+                    expected)
+            edu_info['tpos_words'] = set(
+                tpos for tpos in ptree.treepositions('leaves')
+                if ptree[tpos].overlaps(edu))
+            assert (features_li2014.get_syntactic_labels(doc, edu_info) ==
+                    expected)
@@ -58,13 +58,12 @@ There is a typology of unit types worth noting:
 """
 
 from collections import namedtuple
-import copy
-import itertools
 import math
 import re
 import warnings
 
 from educe.annotation import Unit, Relation, Schema
+from educe.corpus import FileId
 import educe.glozz as glozz
 
 
@@ -111,8 +110,25 @@ DIALOGUE_ACTS = [
     'Other'
 ]
 
+# frozen copies of the type lists above, for fast membership tests in
+# the predicates below (the lists are kept for ordering and for callers
+# that concatenate them)
+_TURN_TYPES = frozenset(TURN_TYPES)
+_STRUCTURE_TYPES = frozenset(STRUCTURE_TYPES)
+_RESOURCE_TYPES = frozenset(RESOURCE_TYPES)
+_PREFERENCE_TYPES = frozenset(PREFERENCE_TYPES)
+_SUBORDINATING_RELATIONS = frozenset(SUBORDINATING_RELATIONS)
+_COORDINATING_RELATIONS = frozenset(COORDINATING_RELATIONS)
+# unit types that are not EDUs
+_NON_EDU_TYPES = _STRUCTURE_TYPES | _RESOURCE_TYPES | _PREFERENCE_TYPES
+# relation types of relation instances
+_ALL_RELATIONS = _SUBORDINATING_RELATIONS | _COORDINATING_RELATIONS
+
 _F_ADDRESSEE = 'Addressee'
 
+_TURN_PREFIX_RE = re.compile(r'(^[0-9]+(?:[.][0-9]+)* ?: .*? ?: )(.*)$')
+"Turn number and speaker prefix of STAC turn texts (see `split_turn_text`)"
+
 
 def split_turn_text(text):
     """
@@ -127,8 +143,7 @@ def split_turn_text(text):
 
     Mind your offsets! They're based on the whole turn string.
     """
-    prefix_re = re.compile(r'(^[0-9]+(?:[.][0-9]+)* ?: .*? ?: )(.*)$')
-    match = prefix_re.match(text)
+    match = _TURN_PREFIX_RE.match(text)
     if match:
         return (match.group(1), match.group(2))
     else:
@@ -178,7 +193,12 @@ def turn_id(anno):
         Turn identifier ; None if the annotation has no feature
         'Identifier'.
     """
-    tid_str = anno.features.get('Identifier')
+    # turns almost always have an identifier
+    try:
+        tid_str = anno.features['Identifier']
+    except KeyError:
+        return None
+    # (empty feature elements are read as None)
     return TurnId.from_string(tid_str) if tid_str is not None else None
 
 
@@ -226,6 +246,10 @@ RENAMES = {
 "Dialogue acts that should be treated as a different one"
 
 
+_DIALOGUE_ACTS = {}
+"Cache for `dialogue_act`: type string to frozenset of dialogue acts"
+
+
 def dialogue_act(anno):
     """
     Set of dialogue act (aka speech act) annotations for a Unit, taking into
@@ -234,7 +258,18 @@ def dialogue_act(anno):
     By rights should be singleton set, but there used to be more than one,
     something we want to phase out?
     """
-    return frozenset(RENAMES.get(k, k) for k in split_type(anno))
+    atype = anno.type
+    try:
+        return _DIALOGUE_ACTS[atype]
+    except KeyError:
+        pass
+    if '/' in atype:
+        acts = frozenset(RENAMES.get(k, k) for k in split_type(anno))
+    else:
+        # common case: a single dialogue act
+        acts = frozenset([RENAMES.get(atype, atype)])
+    _DIALOGUE_ACTS[atype] = acts
+    return acts
 
 
 def relation_labels(anno):
@@ -242,9 +277,12 @@ def relation_labels(anno):
     Set of relation labels (eg. Elaboration, Explanation),
     taking into consideration any applicable STAC-isms
     """
-    renames = {}
+    # no STAC-ism applies to relation labels for now
+    return split_type(anno)
+
 
-    return frozenset(renames.get(k, k) for k in split_type(anno))
+_SPLIT_TYPES = {}
+"Cache for `split_type`: type string to frozenset of items"
 
 
 def split_type(anno):
@@ -252,7 +290,15 @@ def split_type(anno):
     An object's type as a (frozen)set of items.
     You're probably looking for `educe.stac.dialogue_act` instead.
     """
-    return frozenset(anno.type.split("/"))
+    # there are few distinct type strings in a corpus, so we build
+    # the set of items once per type string
+    atype = anno.type
+    try:
+        return _SPLIT_TYPES[atype]
+    except KeyError:
+        items = frozenset(atype.split("/"))
+        _SPLIT_TYPES[atype] = items
+        return items
 
 
 def is_resource(annotation):
@@ -260,7 +306,7 @@ def is_resource(annotation):
     See Unit typology above
     """
     return (isinstance(annotation, Unit) and
-            annotation.type in RESOURCE_TYPES)
+            annotation.type in _RESOURCE_TYPES)
 
 
 def is_preference(annotation):
@@ -268,7 +314,7 @@ def is_preference(annotation):
     See Unit typology above
     """
     return (isinstance(annotation, Unit) and
-            annotation.type in PREFERENCE_TYPES)
+            annotation.type in _PREFERENCE_TYPES)
 
 
 def is_turn(annotation):
@@ -276,7 +322,7 @@ def is_turn(annotation):
     See Unit typology above
     """
     return (isinstance(annotation, Unit) and
-            annotation.type in TURN_TYPES)
+            annotation.type in _TURN_TYPES)
 
 
 def is_paragraph(annotation):
@@ -305,9 +351,8 @@ def is_edu(annotation):
     """
     See Unit typology above
     """
-    blacklist = STRUCTURE_TYPES + RESOURCE_TYPES + PREFERENCE_TYPES
     return (isinstance(annotation, Unit) and
-            annotation.type not in blacklist)
+            annotation.type not in _NON_EDU_TYPES)
 
 
 def is_relation_instance(annotation):
@@ -315,8 +360,7 @@ def is_relation_instance(annotation):
     See Relation typology above
     """
     return (isinstance(annotation, Relation) and
-            annotation.type in SUBORDINATING_RELATIONS or
-            annotation.type in COORDINATING_RELATIONS)
+            annotation.type in _ALL_RELATIONS)
 
 
 def is_subordinating(annotation):
@@ -324,7 +368,7 @@ def is_subordinating(annotation):
     See Relation typology above
     """
     return (isinstance(annotation, Relation) and
-            annotation.type in SUBORDINATING_RELATIONS)
+            annotation.type in _SUBORDINATING_RELATIONS)
 
 
 def is_coordinating(annotation):
@@ -332,7 +376,7 @@ def is_coordinating(annotation):
     See Relation typology above
     """
     return (isinstance(annotation, Relation) and
-            annotation.type in COORDINATING_RELATIONS)
+            annotation.type in _COORDINATING_RELATIONS)
 
 
 def is_cdu(annotation):
@@ -357,7 +401,7 @@ def is_structure(annotation):
     annotator is expected not to edit, create, delete
     """
     return (isinstance(annotation, Unit) and
-            annotation.type in STRUCTURE_TYPES)
+            annotation.type in _STRUCTURE_TYPES)
 
 
 def cleanup_comments(anno):
@@ -368,7 +412,7 @@ def cleanup_comments(anno):
     """
     placeholder = "Please write in remarks..."
     ckey = "Comments"
-    if ckey in anno.features.keys() and anno.features[ckey] == placeholder:
+    if anno.features.get(ckey) == placeholder:
         del anno.features[ckey]
 
 
@@ -392,8 +436,9 @@ def twin(corpus, anno, stage='units'):
     """
     if anno.origin is None:
         raise Exception('Annotation origin must be set')
-    twin_key = copy.copy(anno.origin)
-    twin_key.stage = stage
+    origin = anno.origin
+    # only used as a corpus key, so a plain FileId will do
+    twin_key = FileId(origin.doc, origin.subdoc, stage, origin.annotator)
     if twin_key in corpus:
         return twin_from(corpus[twin_key], anno)
     else:
@@ -404,11 +449,29 @@ def twin_from(doc, anno):
     """
     Given a document and an annotation, return the first annotation in
     the document with a matching local identifier.
+
+    See `local_id_index` if you need to look up many twins in the same
+    document.
     """
     anno_local_id = anno.local_id()
-    twins = [u for u in doc.annotations()
-             if u.local_id() == anno_local_id]
-    return twins[0] if twins else None
+    for twin_anno in doc.iter_annotations():
+        if twin_anno.local_id() == anno_local_id:
+            return twin_anno
+    return None
+
+
+def local_id_index(doc):
+    """
+    Dictionary from local identifier to the first annotation of the
+    document with that identifier (ie. what `twin_from` would return).
+
+    This is a snapshot of the document: it does not follow later
+    modifications of the document.
+    """
+    index = {}
+    for anno in doc.iter_annotations():
+        index.setdefault(anno.local_id(), anno)
+    return index
 
 
 def speaker(anno):
@@ -534,37 +597,38 @@ def create_units(_, doc, author, partial_units):
     # and subtract from there.
     #
     # For readability, we'll jump up a couple powers of 10
-    creation_dates = [int(u.metadata['creation-date']) for u in doc.units]
-    smallest_neg_date = min(creation_dates)
-    if smallest_neg_date > 0:
-        smallest_neg_date = -1  # don't use 0 because log10(0)
+    # (start from -1 rather than 0 because log10(0); this also covers
+    # documents without units)
+    smallest_neg_date = -1
+    for unit in doc.units:
+        creation_date = int(unit.metadata['creation-date'])
+        if creation_date < smallest_neg_date:
+            smallest_neg_date = creation_date
     # next two power of 10
     id_base = 10 ** (int(math.log10(abs(smallest_neg_date))) + 2)
 
-    def mk_creation_date(counter):
-        "from counter to string for next available creation date"
-        return str(0 - (id_base + counter))
-
-    def mk_unit(partial, counter):
-        "from PartialUnit and counter to Unit"
-
-        # Note that Glozz seems to identify items by the pair of author and
-        # creation date, ignoring the unit ID altogether (assumed to be
-        # author_date)
-        creation_date = mk_creation_date(counter)
-        metadata = {'author': author,
-                    'creation-date': creation_date,
-                    'lastModifier': 'n/a',
-                    'lastModificationDate': '0'}
-        unit_id = '_'.join([author, str(counter)])
-        return Unit(unit_id,
-                    partial.span,
-                    partial.type,
-                    partial.features,
-                    metadata)
-
-    return [mk_unit(x, i) for x, i in
-            itertools.izip(partial_units, itertools.count(0))]
+    # Note that Glozz seems to identify items by the pair of author and
+    # creation date, ignoring the unit ID altogether (assumed to be
+    # author_date)
+    base_metadata = {'author': author,
+                     'lastModifier': 'n/a',
+                     'lastModificationDate': '0'}
+    # the parts of the unit ids and creation dates that do not
+    # depend on the unit
+    id_prefix = author + '_'
+    first_date = 0 - id_base
+    units = []
+    for counter, partial in enumerate(partial_units):
+        metadata = base_metadata.copy()
+        # next available creation date
+        metadata['creation-date'] = str(first_date - counter)
+        unit_id = id_prefix + str(counter)
+        units.append(Unit(unit_id,
+                          partial.span,
+                          partial.type,
+                          partial.features,
+                          metadata))
+    return units
 
 
 # NEW 2016-06-15
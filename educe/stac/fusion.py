@@ -33,7 +33,8 @@ import copy
 import itertools
 
 from educe.annotation import (Span, Unit)
-from educe.stac.annotation import (is_edu, speaker, turn_id, twin_from)
+from educe.stac.annotation import (is_edu, speaker, turn_id,
+                                    local_id_index)
 from educe.stac.context import (Context)
 
 ROOT = 'ROOT'
@@ -290,8 +291,10 @@ def fuse_edus(discourse_doc, unit_doc, postags):
     annos = sorted([x for x in doc.units if is_edu(x)],
                    key=lambda x: x.span)
     replacements = {}
+    # twins from the units stage, indexed once (unit_doc does not change)
+    unit_twins = {} if unit_doc is None else local_id_index(unit_doc)
     for anno in annos:
-        unit_anno = None if unit_doc is None else twin_from(unit_doc, anno)
+        unit_anno = unit_twins.get(anno.local_id())
         edu = EDU(doc, anno, unit_anno)
         replacements[anno] = edu
 
@@ -174,5 +174,4 @@ def main(args):
                   for key in inputs.corpus)
 
     writer = _conll_writer(args)
-    for row in rows:
-        writer.writerow(row)
+    writer.writerows(rows)
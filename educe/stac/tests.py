@@ -196,6 +196,46 @@ def test_fake_objs():
     assert stac.is_cdu(cdu1)
 
 
+def test_is_relation_instance():
+    "only relations can be relation instances, whatever their type"
+    assert stac.is_relation_instance(FakeRelInst('r', edu1, edu2,
+                                                 type='Result'))
+    assert not stac.is_relation_instance(FakeEDU('e', type='Result'))
+    assert not stac.is_relation_instance(FakeEDU('e', type='Comment'))
+    assert not stac.is_edu(FakeEDU('e', type='Resource'))
+
+
+def test_twin_from():
+    "twin lookup by local identifier, following changes to the doc"
+    doc = FakeDocument([edu1, edu2], [rel1], [])
+    assert stac.twin_from(doc, edu2) is doc.copies[edu2]
+    assert stac.twin_from(doc, rel1) is doc.copies[rel1]
+    assert stac.twin_from(doc, edu3) is None
+    doc.units.append(copy.deepcopy(edu3))
+    assert stac.twin_from(doc, edu3) is doc.units[-1]
+    doc.units[0]._anno_id = 'e-renamed'
+    assert stac.twin_from(doc, edu1) is None
+    # replacing a unit in place, or removing and re-appending one, as
+    # fusion does, keeps the list lengths unchanged
+    new_edu2 = copy.deepcopy(edu2)
+    doc.units[1] = new_edu2
+    assert stac.twin_from(doc, edu2) is new_edu2
+    doc.units.remove(new_edu2)
+    newer_edu2 = copy.deepcopy(edu2)
+    doc.units.append(newer_edu2)
+    assert stac.twin_from(doc, edu2) is newer_edu2
+
+
+def test_local_id_index():
+    "the index agrees with twin_from, first match wins"
+    doc = FakeDocument([edu1, edu2], [rel1], [])
+    doc.units.append(copy.deepcopy(edu1))
+    index = stac.local_id_index(doc)
+    for anno in [edu1, edu2, rel1, edu3]:
+        assert index.get(anno.local_id()) is stac.twin_from(doc, anno)
+    assert index['e1'] is doc.units[0]
+
+
 def test_cdu_head_multiheaded():
     "trivial CDU membership"
     doc = FakeDocument([edu1, edu2, edu3],
@@ -392,12 +392,12 @@ def read_game_as_dataframes(game_folder, sel_annotator=None, thorough=True,
                 df_res.append(unit_dict)
             elif is_preference(anno):
                 if anno.features:
-                    print(anno.__dict__)
+                    print(anno)
                     raise ValueError('Preference with features {}'.format(
                         anno.features))
                 df_pref.append(unit_dict)
             else:
-                print(anno.__dict__)
+                print(anno)
                 raise ValueError('what unit is this?')
             # print('Unit', anno)
 
@@ -429,7 +429,7 @@ def read_game_as_dataframes(game_folder, sel_annotator=None, thorough=True,
                         })
                     else:
                         print(anno.origin)
-                        print(anno.__dict__)
+                        print(anno)
                         print(anno.features)
                         raise ValueError('{}: schema with *features*'.format(
                             stage))
@@ -442,7 +442,7 @@ def read_game_as_dataframes(game_folder, sel_annotator=None, thorough=True,
                         })
                     else:
                         print(anno.origin)
-                        print(anno.__dict__)
+                        print(anno)
                         print(anno.features)
                         raise ValueError('{}: schema with *features*'.format(
                             stage))
@@ -8,11 +8,18 @@
 Tests for educe
 """
 
+import random
 import unittest
 
+import numpy as np
+
+from educe import annotation
+import educe._annotation_kernels as kernels
+import educe._annotation_kernels_jit as jit_kernels
 from educe.annotation import (Span, RelSpan,
-                              Annotation,
+                              Standoff,
                               Unit, Relation, Schema, Document)
+from educe.corpus import FileId
 import educe.graph as educe
 from educe.graph import EnclosureGraph
 from educe.util import relative_indices
@@ -78,8 +85,39 @@ class SpanTest(unittest.TestCase):
         self.assertOverlap((5, 5), (5, 5), (4, 5), inclusive=True)
         self.assertOverlap((5, 5), (5, 5), (5, 6), inclusive=True)
 
+    def test_encloses_many(self):
+        "Span.encloses_many() agrees with Span.encloses()"
+
+        pairs = [(1, 3), (2, 5), (5, 10), (0, 6), (5, 5)]
+        outer = Span(1, 5)
+        starts = [x for x, _ in pairs]
+        ends = [y for _, y in pairs]
+        self.assertEqual([outer.encloses(Span(x, y)) for x, y in pairs],
+                         list(outer.encloses_many(starts, ends)))
+
+    def test_ordering(self):
+        "Span comparison operators"
+
+        self.assertTrue(Span(1, 5) < Span(2, 3))
+        self.assertTrue(Span(1, 3) < Span(1, 5))
+        self.assertTrue(Span(1, 5) <= Span(1, 5))
+        self.assertTrue(Span(2, 3) > Span(1, 5))
+        self.assertTrue(Span(1, 5) >= Span(1, 3))
+        self.assertFalse(Span(1, 5) != Span(1, 5))
+        self.assertEqual([Span(1, 3), Span(1, 5), Span(2, 3)],
+                         sorted([Span(2, 3), Span(1, 5), Span(1, 3)]))
 
-class NullAnno(Span, Annotation):
+    def test_hash(self):
+        "Span as dict/set key"
+
+        spans = set([Span(1, 5), Span(1, 5), Span(2, 3)])
+        self.assertEqual(2, len(spans))
+        self.assertTrue(Span(2, 3) in spans)
+
+
+# Span and Annotation both declare __slots__, so they cannot be
+# combined as bases ; Standoff is enough to get text_span()
+class NullAnno(Span, Standoff):
     def __init__(self, start, end, type="null"):
         super(NullAnno, self).__init__(start, end)
         self.span = self
@@ -219,6 +257,141 @@ def test_members():
         assert sp.char_end <= doc_sp.char_end
 
 
+def test_schema_members_unique():
+    u1 = TestUnit('u1', 2, 4)
+    s1 = TestSchema('s1', ['u1'], [], [])
+    # an id listed as both a unit and a schema is only a member once
+    s2 = TestSchema('s2', ['u1', 's1'], [], ['s1'])
+    TestDocument([u1], [], [s1, s2], "why hello there!")
+    assert len(s2.span) == 2
+    assert sorted(s2.members) == sorted([u1, s1])
+
+
+def test_terminals_shared():
+    u1 = TestUnit('u1', 2, 4)
+    u2 = TestUnit('u2', 3, 9)
+    u3 = TestUnit('u3', 9, 12)
+    s1 = TestSchema('s1', ['u1', 'u2'], [], [])
+    s2 = TestSchema('s2', ['u2', 'u3'], [], [])
+    s3 = TestSchema('s3', ['u1'], [], ['s1', 's2'])
+    TestDocument([u1, u2, u3], [], [s1, s2, s3], "why hello there!")
+    # shared members are only reported once
+    assert sorted(s3._terminals()) == sorted([u1, u2, u3])
+    assert s3.text_span() == Span(2, 12)
+
+
+def test_terminals_deep():
+    u1 = TestUnit('u1', 2, 4)
+    schemas = [TestSchema('s0', ['u1'], [], [])]
+    for i in range(1, 5000):
+        schemas.append(TestSchema('s%d' % i, [], [], ['s%d' % (i - 1)]))
+    TestDocument([u1], [], schemas, "why hello there!")
+    # deeper than the default recursion limit
+    assert schemas[-1]._terminals() == [u1]
+
+
+def test_terminals_rewired():
+    u1 = TestUnit('u1', 2, 4)
+    u2 = TestUnit('u2', 3, 9)
+    u3 = TestUnit('u3', 9, 12)
+    s1 = TestSchema('s1', ['u1', 'u2'], [], [])
+    r1 = TestRelation('r1', 's1', 'u2')
+    TestDocument([u1, u2, u3], [r1], [s1], "why hello there!")
+    assert sorted(r1._terminals()) == sorted([u1, u2])
+    # terminals must follow changes to nested members
+    s1.members = [u3]
+    assert sorted(r1._terminals()) == sorted([u2, u3])
+    assert r1.text_span() == Span(3, 12)
+
+
+def test_units_enclosed_by():
+    u1 = TestUnit('u1', 2, 4)
+    u2 = TestUnit('u2', 3, 9)
+    u3 = TestUnit('u3', 9, 12)
+    doc = TestDocument([u1, u2, u3], [], [], "why hello there!")
+    assert list(doc.units_enclosed_by(Span(2, 9))) == [0, 1]
+    assert list(doc.units_enclosed_by(Span(5, 8))) == []
+    # the offsets follow changes to the unit list
+    doc.units = [u3, u1]
+    assert list(doc.units_enclosed_by(Span(2, 9))) == [1]
+    # ... including units replaced in place
+    doc.units[0] = u2
+    assert list(doc.units_enclosed_by(Span(2, 9))) == [0, 1]
+    # ... and changes to the spans of the units
+    u2.span = Span(10, 11)
+    assert list(doc.units_enclosed_by(Span(2, 9))) == [1]
+    assert list(doc.units_overlapping(Span(10, 12))) == [0]
+
+
+def test_units_overlapping():
+    spans = [(2, 4), (3, 9), (9, 12), (5, 5), (0, 20)]
+    units = [TestUnit('u%d' % i, x, y) for i, (x, y) in enumerate(spans)]
+    doc = TestDocument(units, [], [], "why hello there!")
+    for query in [Span(4, 9), Span(9, 9), Span(1, 3), Span(12, 15)]:
+        expected = [i for i, u in enumerate(units)
+                    if query.overlaps(u.span)]
+        assert list(doc.units_overlapping(query)) == expected
+
+
+def _random_spans(nb_spans, seed=0):
+    "random spans over a short text, so that many of them overlap"
+    rng = random.Random(seed)
+    res = []
+    for _ in range(nb_spans):
+        start = rng.randint(0, 50)
+        res.append((start, start + rng.randint(0, 10)))
+    return res
+
+
+def test_span_kernels():
+    "bulk kernels, compiled or not, agree with Span.encloses/overlaps"
+    spans = _random_spans(500)
+    starts = np.array([x for x, _ in spans], dtype=np.int32)
+    ends = np.array([y for _, y in spans], dtype=np.int32)
+    out = np.empty(len(spans), dtype=np.bool_)
+    for q_start, q_end in _random_spans(50, seed=1) + [(5, 5)]:
+        query = Span(q_start, q_end)
+        expected_enc = [query.encloses(Span(*x)) for x in spans]
+        expected_ovl = [query.overlaps(Span(*x)) is not None
+                        for x in spans]
+        for kernel in [kernels.numpy_encloses, jit_kernels.bulk_encloses]:
+            kernel(q_start, q_end, starts, ends, out)
+            assert list(out) == expected_enc
+        for kernel in [kernels.numpy_overlaps, jit_kernels.bulk_overlaps]:
+            kernel(q_start, q_end, starts, ends, out)
+            assert list(out) == expected_ovl
+
+
+def test_units_matching_large():
+    "documents above the kernel threshold give the same answers"
+    spans = _random_spans(annotation._KERNEL_MIN_UNITS + 10)
+    units = [TestUnit('u%d' % i, x, y) for i, (x, y) in enumerate(spans)]
+    doc = TestDocument(units, [], [], "why hello there!")
+    for query in [Span(4, 9), Span(9, 9), Span(30, 45)]:
+        expected_enc = [i for i, u in enumerate(units)
+                        if query.encloses(u.span)]
+        expected_ovl = [i for i, u in enumerate(units)
+                        if query.overlaps(u.span)]
+        assert list(doc.units_enclosed_by(query)) == expected_enc
+        assert list(doc.units_overlapping(query)) == expected_ovl
+
+
+def test_position():
+    u1 = TestUnit('u1', 2, 4)
+    assert u1.position() == '2:4'
+    u1.origin = FileId('d1', '01', 'units', 'bob')
+    assert u1.position() == 'd1:01:units:2:4'
+
+
+def test_identifier():
+    u1 = TestUnit('u1', 2, 4)
+    assert u1.identifier() == 'u1'
+    u1.origin = FileId('d1', '01', 'units', 'bob')
+    assert u1.identifier() == 'd1_01_u1'
+    u1.origin = FileId('d2', None, 'units', 'bob')
+    assert u1.identifier() == 'd2_u1'
+
+
 # ---------------------------------------------------------------------
 # graph
 # ---------------------------------------------------------------------
@@ -20,6 +20,7 @@ REQS = [
     'six',
     'tabulate',
     'nltk >= 3.0.0',
+    'numpy',
     'soundex',
     'pandas >= 0.17',
 ]